@@ -3,12 +3,97 @@
 """Main module."""
 
 
+import logging
+import threading
+import time
+import warnings
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import pandas as pd
 import elasticsearch
+import elasticsearch.helpers
+import elasticsearch.serializer
 from . import kibana
 from . import docker
 
-from .util import chunker, print_or_display, rm_nan_from_dict
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .util import Progbar, print_or_display, record_chunks
+
+# Seconds for which a successful ElasticStack.alive() check is reused:
+_ALIVE_TTL = 5
+
+# Index settings used while bulk loading, restored after the load:
+_BULK_INDEX_SETTINGS = {"refresh_interval": "-1", "translog.durability": "async"}
+
+# Timeout in seconds for bulk requests, other requests keep the client's shorter default:
+_BULK_REQUEST_TIMEOUT = 60
+
+# Defaults for the Elasticsearch client, keep enough keep-alive connections for bulk loads
+# and gzip request bodies (accepted by Elasticsearch by default):
+_ELASTIC_CLIENT_DEFAULTS = {
+    "maxsize": 16,
+    "http_compress": True,
+    "retry_on_timeout": True,
+    "max_retries": 3,
+    "sniff_on_start": False,
+    "sniff_on_connection_fail": False,
+}
+
+
+# Loggers reporting failed connections, silenced while probing the servers in alive():
+_CONNECTION_LOGGERS = [logging.getLogger("urllib3"), logging.getLogger("elasticsearch")]
+
+
+@contextmanager
+def _quiet(es):
+    """Silence connection logging and disable retries of ``es`` within the context."""
+    orig_levels = [logger.level for logger in _CONNECTION_LOGGERS]
+    orig_max_retries = es.transport.max_retries
+    try:
+        for logger in _CONNECTION_LOGGERS:
+            logger.setLevel(logging.FATAL)
+        es.transport.max_retries = 0
+        yield
+    finally:
+        for logger, level in zip(_CONNECTION_LOGGERS, orig_levels):
+            logger.setLevel(level)
+        es.transport.max_retries = orig_max_retries
+
+
+class ORJSONSerializer(elasticsearch.serializer.JSONSerializer):
+    """JSON serializer for the Elasticsearch client based on the much faster ``orjson``.
+
+    It is used by default if ``orjson`` is installed. Types ``orjson`` does not know
+    (e.g. pandas timestamps) fall back to the conversions of the default serializer.
+    """
+
+    def dumps(self, data):
+        if isinstance(data, str):
+            return data
+        try:
+            return orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            ).decode("utf-8")
+        except (ValueError, TypeError) as e:
+            raise elasticsearch.SerializationError(data, e)
+
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except ValueError as e:
+            raise elasticsearch.SerializationError(s, e)
+
+
+if orjson is not None:
+    _ELASTIC_CLIENT_DEFAULTS["serializer"] = ORJSONSerializer()
 
 
 def connect_elastic(
@@ -143,10 +228,11 @@ class ElasticStack(object):
         self._verify_certs = verify_certs
 
         self._es = None
+        self._server_version = None
         self._kibana = None
+        self._alive_until = 0
         self._elasticKwargs = kwargs
-
-        self.kibana = kibana.Kibana(
+        self._kibanaKwargs = dict(
             host=self._host if kibana_host is None else kibana_host,
             port=kibana_port,
             protocol=self._protocol if kibana_protocol is None else kibana_protocol,
@@ -157,40 +243,40 @@ class ElasticStack(object):
             set_default_elk(self)
 
     def alive(self, verbose=True):
-        import logging
-
-        urllib_logger = logging.getLogger("request")
-        orig_max_retries = 3
-        orig_level = urllib_logger.level
+        # a positive answer is trusted for _ALIVE_TTL seconds:
+        if time.monotonic() < self._alive_until:
+            return True
         result = False
         try:
-            # BUG Disabling logging does not work:
-            urllib_logger.setLevel(logging.FATAL)
-            orig_max_retries = self.es.transport.max_retries
-            self.es.transport.max_retries = 0
-            result = self.es.ping() and self.kibana.alive()
+            with _quiet(self.es):
+                result = self.es.ping() and self.kibana.alive()
         except Exception as e:
             if verbose:
                 print(e)
-        self.es.transport.max_retries = orig_max_retries
-        urllib_logger.setLevel(orig_level)
+        if result:
+            self._alive_until = time.monotonic() + _ALIVE_TTL
         return result
 
+    def invalidate_alive(self):
+        """Forget the last positive result of :meth:`alive` so the next call checks the servers."""
+        self._alive_until = 0
+
     def wait_for(
         self,
         timeout: float = 10,
-        interval: float = 0.5,
+        interval: float = 0.1,
         raise_error=False,
         verbose=False,
+        max_interval: float = 2.0,
     ) -> bool:
-        from datetime import datetime
-        from time import sleep
-
-        start = datetime.now()
-        while timeout <= 0 or (datetime.now() - start).seconds < timeout:
+        start = time.monotonic()
+        delay = interval
+        while timeout <= 0 or time.monotonic() - start < timeout:
             if self.alive(verbose=verbose):
                 return True
-            sleep(interval)
+            # exponential backoff between the probes:
+            time.sleep(min(delay, max_interval))
+            delay *= 1.5
         if raise_error:
             raise RuntimeError("")
         return False
@@ -215,11 +301,33 @@ class ElasticStack(object):
                 "port": self._elasticPort,
                 "use_ssl": self._protocol == "https",
             }
+            kwargs = dict(_ELASTIC_CLIENT_DEFAULTS, **self._elasticKwargs)
             self._es = elasticsearch.Elasticsearch(
-                [host], verify_certs=self._verify_certs, **self._elasticKwargs
+                [host], verify_certs=self._verify_certs, **kwargs
             )
         return self._es
 
+    @property
+    def kibana(self):
+        if self._kibana is None:
+            self._kibana = kibana.Kibana(**self._kibanaKwargs)
+        return self._kibana
+
+    @property
+    def server_version(self):
+        """Version number of the Elasticsearch server, queried once and then cached."""
+        if self._server_version is None:
+            self._server_version = self.es.info()["version"]["number"]
+        return self._server_version
+
+    def reconnect(self):
+        """Close the Elasticsearch client and drop cached server info, they are recreated on next use."""
+        if self._es is not None:
+            self._es.transport.close()
+        self._es = None
+        self._server_version = None
+        self.invalidate_alive()
+
     def get_analysis(self, lang="english", synonyms=None):
         filter_names = []
         if lang == "english":
@@ -259,26 +367,35 @@ class ElasticStack(object):
         lang="english",
         delete_old=True,
         verbose=False,
+        suggest_col=None,
     ):
         # assert lang == 'english'
-        properties = {}
-        for k in text_cols:
-            # TODO Make sure that the analyzer is created as f"{lang}_syn":
-            properties[k] = {
-                "type": "text",
-                "fielddata": True,
-                "analyzer": f"{lang}_syn",
-            }
-        for k in tag_cols:
-            properties[k] = {"type": "keyword"}
-        for k in geopoint_cols:
-            properties[k] = {"type": "geo_point"}
+        # TODO Make sure that the analyzer is created as f"{lang}_syn":
+        properties = {
+            k: {"type": "text", "fielddata": True, "analyzer": f"{lang}_syn"}
+            for k in text_cols
+        }
+        properties.update((k, {"type": "keyword"}) for k in tag_cols)
+        properties.update((k, {"type": "geo_point"}) for k in geopoint_cols)
         properties["suggest"] = {"type": "completion"}
+        # Elasticsearch fills the completion field from the suggest column(s) itself:
+        if isinstance(suggest_col, str):
+            suggest_col = [suggest_col]
+        for k in suggest_col or []:
+            # same as the dynamic mapping Elasticsearch would create for a string column
+            properties.setdefault(
+                k,
+                {
+                    "type": "text",
+                    "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
+                },
+            )
+            properties[k]["copy_to"] = "suggest"
         mapping = {
             # "_timestamp": {"enabled": "false"},
             "properties": properties
         }
-        if self.es.info()["version"]["number"] < "7":
+        if self.server_version < "7":
             mapping = {doctype: mapping}
         if create:
             filters, analyzer = self.get_analysis(lang, synonyms)
@@ -312,11 +429,8 @@ class ElasticStack(object):
             }
             if verbose:
                 print(body)
-            if delete_old:
-                try:
-                    self.es.indices.delete(index)
-                except:  # noqa: E722
-                    pass
+            if delete_old and self.es.indices.exists(index=index):
+                self.es.indices.delete(index=index)
             self.es.indices.create(index=index, body=body)  # , ignore=[]
             return body
         else:
@@ -332,29 +446,132 @@ class ElasticStack(object):
         id_col=None,
         suggest_col=None,
         progbar=True,
+        thread_count=4,
+        verbose=False,
+        relax_settings=False,
     ):
+        if suggest_col:
+            warnings.warn(
+                "load_docs(suggest_col=...) copies the column in every document, "
+                "prefer create_index(suggest_col=...) which lets Elasticsearch do it",
+                FutureWarning,
+                stacklevel=2,
+            )
         if id_col is None:
             id_col = texts.index
-        if delete_old:
-            try:
-                self.es.indices.delete(index)
-            except:  # noqa: E722
-                pass
+        elif isinstance(id_col, str):
+            id_col = texts[id_col]
+        # Plain list of ids, so the per-document lookup is a cheap list access
+        # (the values are converted by the serializer as before, e.g. timestamps to isoformat):
+        ids = pd.Index(id_col).astype(object)
+        ids = ids.where(ids.notna(), None).tolist()
+        # Columns without any value would only be left out of every single document:
+        non_empty = texts.dropna(axis=1, how="all")
+        if verbose and non_empty.shape[1] < texts.shape[1]:
+            dropped = [c for c in texts.columns if c not in non_empty.columns]
+            print(f"Not uploading empty columns: {dropped}")
+        texts = non_empty
+        if delete_old and self.es.indices.exists(index=index):
+            self.es.indices.delete(index=index)
         # createIndex(index=index, create=deleteOld)
 
-        for ic, cdf in enumerate(chunker(texts, chunksize, progbar=progbar)):
-            docs = cdf.to_dict(orient="records")
-            for ii, doc in enumerate(docs):
-                i = ic * chunksize + ii
-                doc = rm_nan_from_dict(doc)
-                if suggest_col and suggest_col in doc:
-                    doc["suggest"] = doc[suggest_col]
-                try:
-                    self.es.index(index=index, doc_type=doctype, id=id_col[i], body=doc)
-                except elasticsearch.ElasticsearchException as ex:
-                    print(ex)
-                    print(doc)
-                    print("=" * 80)
+        def chunk_actions(offset, docs):
+            if suggest_col:
+                for doc in docs:
+                    if suggest_col in doc:
+                        doc["suggest"] = doc[suggest_col]
+            actions = []
+            for i, doc in enumerate(docs):
+                action = {"_index": index, "_type": doctype, "_source": doc}
+                # without an id Elasticsearch generates one, as es.index(id=None) did:
+                if ids[offset + i] is not None:
+                    action["_id"] = ids[offset + i]
+                actions.append(action)
+            return actions
+
+        indexed, errors = 0, []
+        if progbar:
+            pbar: Progbar = Progbar(len(texts))
+            pbar.update(0)
+
+        def collect(future, n_docs):
+            # bulk returns the failed items of a chunk as a list instead of raising:
+            nonlocal indexed
+            ok, chunk_errors = future.result()
+            indexed += ok
+            for error in chunk_errors:
+                print(error)
+                print("=" * 80)
+            errors.extend(chunk_errors)
+            if progbar:
+                pbar.add(n_docs)
+
+        orig_settings = self.relax_index_settings(index) if relax_settings else None
+        try:
+            # Build the next chunks while up to thread_count bulk requests are in flight:
+            with ThreadPoolExecutor(max_workers=thread_count) as executor:
+                pending = deque()
+                offset = 0
+                for docs in record_chunks(texts, chunksize, progbar=False):
+                    if len(pending) >= thread_count:
+                        collect(*pending.popleft())
+                    future = executor.submit(
+                        elasticsearch.helpers.bulk,
+                        self.es,
+                        chunk_actions(offset, docs),
+                        chunk_size=chunksize,
+                        request_timeout=_BULK_REQUEST_TIMEOUT,
+                        raise_on_error=False,
+                        raise_on_exception=False,
+                    )
+                    pending.append((future, len(docs)))
+                    offset += len(docs)
+                while pending:
+                    collect(*pending.popleft())
+        finally:
+            if orig_settings is not None:
+                self.restore_index_settings(index, orig_settings)
+        return indexed, errors
+
+    def relax_index_settings(self, index):
+        """Switch off refreshes and fsyncs per request on an existing index for bulk loads.
+
+        Call :meth:`restore_index_settings` with the result once all the loads are finished.
+
+        Parameters
+        ----------
+        index :
+            Name of the index, may also be an alias or a pattern.
+
+        Returns
+        -------
+        The previous values of the changed settings per concrete index (``None`` meaning the
+        server default), or ``None`` if the index does not exist.
+        """
+        if not self.es.indices.exists(index=index):
+            return None
+        current = self.es.indices.get_settings(index=index, flat_settings=True)
+        orig_settings = {}
+        try:
+            for name, settings in current.items():
+                settings = settings["settings"]
+                orig_settings[name] = {
+                    k: settings.get(f"index.{k}") for k in _BULK_INDEX_SETTINGS
+                }
+                self.es.indices.put_settings(
+                    index=name, body={"index": _BULK_INDEX_SETTINGS}
+                )
+        except BaseException:
+            # do not leave the already changed indices without refreshes:
+            self.restore_index_settings(index, orig_settings)
+            raise
+        return orig_settings
+
+    def restore_index_settings(self, index, orig_settings):
+        """Undo :meth:`relax_index_settings` and refresh the index so the loaded documents are searchable."""
+        for name, settings in orig_settings.items():
+            self.es.indices.put_settings(index=name, body={"index": settings})
+        self.es.indices.refresh(index=index)
 
     def truncate(self, index, doctype="text"):
         self._es.delete_by_query(index, {"query": {"match_all": {}}})
@@ -379,15 +596,20 @@ class ElasticStack(object):
 
 
 __DEFAULT_STACK = None
+__DEFAULT_STACK_LOCK = threading.Lock()
 
 
 def default_stack():
     global __DEFAULT_STACK
     if __DEFAULT_STACK is None:
-        __DEFAULT_STACK = ElasticStack()
+        with __DEFAULT_STACK_LOCK:
+            # check again, another thread might have created it in the meantime:
+            if __DEFAULT_STACK is None:
+                __DEFAULT_STACK = ElasticStack(set_as_default_stack=False)
     return __DEFAULT_STACK
 
 
 def set_default_elk(es):
     global __DEFAULT_STACK
-    __DEFAULT_STACK = es
+    with __DEFAULT_STACK_LOCK:
+        __DEFAULT_STACK = es
@@ -110,6 +110,7 @@ class Pipeline(object):
                 tag_cols=self._tagCols,
                 geopoint_cols=self._geoPointCols,
                 lang=self._lang,
+                suggest_col=self._suggests,
                 **kwargs,
             )
 
@@ -199,28 +200,35 @@ class Pipeline(object):
         """
         if write_elastic is None:
             write_elastic = self.elk is not None
+        orig_settings = None
         if write_elastic:
             self.setup_elastic()
+            # relax the index settings once for all the batches:
+            orig_settings = self.elk.relax_index_settings(self._index)
         results = []
 
         self.tic("global", "process")
-        for chunk in chunker(texts, batchsize, progbar=progbar):
-            x = chunk
-            for i, p in enumerate(self._pipeline):
-                if not progbar:
-                    print(f"Stage {i+1} of {len(self._pipeline)}: {p.name}")
-                self.tic(f"Stage {i+1}", p.name)
-                x = p.process(x)
-                self.toc()
-            if write_elastic:
-                self.write_elastic(
-                    x,
-                    chunksize=batchsize,
-                    progbar=not progbar,
-                    set_kibana_time_default=False,
-                )
-            if return_processed:
-                results.append(x)
+        try:
+            for chunk in chunker(texts, batchsize, progbar=progbar):
+                x = chunk
+                for i, p in enumerate(self._pipeline):
+                    if not progbar:
+                        print(f"Stage {i+1} of {len(self._pipeline)}: {p.name}")
+                    self.tic(f"Stage {i+1}", p.name)
+                    x = p.process(x)
+                    self.toc()
+                if write_elastic:
+                    self.write_elastic(
+                        x,
+                        chunksize=batchsize,
+                        progbar=not progbar,
+                        set_kibana_time_default=False,
+                    )
+                if return_processed:
+                    results.append(x)
+        finally:
+            if orig_settings is not None:
+                self.elk.restore_index_settings(self._index, orig_settings)
         self.toc()
         # return results
         self.tic("global", "concat results")
@@ -246,14 +254,13 @@ class Pipeline(object):
             index=self._index,
             doctype=self._doctype,
             id_col=self._idCol,
-            suggest_col=self._suggests,
             texts=texts.drop(columns=self._ignoreUploadCols, errors="ignore"),
             chunksize=chunksize,
             progbar=progbar,
         )
         self.toc()
         if set_kibana_time_default and self._dateCol is not None:
-            self.elk._kibana.set_kibana_time_defaults(
+            self.elk.kibana.set_kibana_time_defaults(
                 time_from=str(texts[self._dateCol].min()),
                 time_to=str(texts[self._dateCol].max()),
             )
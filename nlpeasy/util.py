@@ -31,6 +31,47 @@ def chunker(seq, size, progbar=True):
             pbar.update(min(pos + size, n))
 
 
+def record_chunks(df, size, progbar=True, use_arrow=True):
+    """Yield the rows of a data frame as lists of at most ``size`` dicts without missing values.
+
+    Column names become strings. If ``pyarrow`` (>= 7) is installed and ``use_arrow`` is set,
+    the records are built by Arrow in C++, else (or if Arrow cannot convert the columns,
+    e.g. for mixed types) by iterating over the pandas rows.
+    """
+    table = _arrow_table(df) if use_arrow else None
+    if table is not None:
+        for batch in chunker(table, size, progbar=progbar):
+            yield [_clean_record(r.items()) for r in batch.to_pylist()]
+        return
+    # Missing values become None in one vectorized pass:
+    df = df.astype(object).where(df.notna(), None)
+    cols = [str(c) for c in df.columns]
+    for cdf in chunker(df, size, progbar=progbar):
+        rows = cdf.itertuples(index=False, name=None)
+        yield [_clean_record(zip(cols, row)) for row in rows]
+
+
+def _arrow_table(df):
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    if not hasattr(pyarrow.Table, "to_pylist"):
+        return None
+    try:
+        return pyarrow.Table.from_pandas(df, preserve_index=False)
+    except (pyarrow.ArrowException, ValueError):
+        return None
+
+
+def _clean_record(items):
+    return {
+        k: rm_nan_from_dict(v) if isinstance(v, (list, dict)) else v
+        for k, v in items
+        if v is not None
+    }
+
+
 def insert_with_progbar(
     engine, df, name, if_exists="replace", chunksize=1000, **kwargs
 ):
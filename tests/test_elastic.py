@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `nlpeasy.elastic` that need no running Elasticsearch."""
+import json
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nlpeasy import elastic, util
+
+
+def test_orjson_serializer():
+    pytest.importorskip("orjson")
+    serializer = elastic.ORJSONSerializer()
+    data = {
+        0: np.int64(1),
+        "f": np.float32(1.5),
+        "arr": np.arange(3),
+        "t": pd.Timestamp("2020-01-01"),
+        "nan": float("nan"),
+    }
+    assert json.loads(serializer.dumps(data)) == {
+        "0": 1,
+        "f": 1.5,
+        "arr": [0, 1, 2],
+        "t": "2020-01-01T00:00:00",
+        "nan": None,
+    }
+    assert serializer.dumps('{"a": 1}') == '{"a": 1}'
+    assert serializer.loads('{"a": [1, null]}') == {"a": [1, None]}
+    with pytest.raises(elastic.elasticsearch.SerializationError):
+        serializer.dumps({"a": object()})
+    with pytest.raises(elastic.elasticsearch.SerializationError):
+        serializer.loads("{")
+
+
+@pytest.fixture
+def stack():
+    stack = elastic.ElasticStack(set_as_default_stack=False)
+    stack._es = mock.MagicMock()
+    stack._es.indices.exists.return_value = False
+    return stack
+
+
+@pytest.fixture
+def bulk_calls(monkeypatch):
+    """Replace ``helpers.bulk`` by a fake that fails on documents with ``fail`` set."""
+    calls = []
+
+    def bulk(client, actions, **kwargs):
+        calls.append(actions)
+        errors = [{"index": a} for a in actions if a["_source"].get("fail")]
+        return len(actions) - len(errors), errors
+
+    monkeypatch.setattr(elastic.elasticsearch.helpers, "bulk", bulk)
+    return calls
+
+
+def test_load_docs_ids_and_result(stack, bulk_calls):
+    df = pd.DataFrame({"key": [f"k{i}" for i in range(25)]})
+    df["fail"] = df.index % 10 == 3
+
+    indexed, errors = stack.load_docs("idx", df, chunksize=10, id_col="key")
+
+    assert [len(actions) for actions in bulk_calls] == [10, 10, 5]
+    actions = [a for chunk in bulk_calls for a in chunk]
+    assert sorted(a["_id"] for a in actions) == sorted(df["key"])
+    assert all(a["_id"] == a["_source"]["key"] for a in actions)
+    assert indexed == 22
+    assert sorted(e["index"]["_id"] for e in errors) == ["k13", "k23", "k3"]
+
+
+def test_load_docs_uneven_chunks(stack, bulk_calls, monkeypatch):
+    def uneven_chunks(df, size, progbar=True):
+        docs = [d for chunk in util.record_chunks(df, size, progbar) for d in chunk]
+        yield docs[:2]
+        yield docs[2:3]
+        yield docs[3:]
+
+    monkeypatch.setattr(elastic, "record_chunks", uneven_chunks)
+    df = pd.DataFrame({"value": range(6)}, index=[f"i{i}" for i in range(6)])
+
+    indexed, errors = stack.load_docs("idx", df, chunksize=10, progbar=False)
+
+    assert [len(actions) for actions in bulk_calls] == [2, 1, 3]
+    actions = [a for chunk in bulk_calls for a in chunk]
+    assert {a["_id"]: a["_source"]["value"] for a in actions} == {
+        f"i{i}": i for i in range(6)
+    }
+    assert (indexed, errors) == (6, [])
+
+
+def test_load_docs_keeps_id_values(stack, bulk_calls):
+    df = pd.DataFrame(
+        {"value": [1, 2, 3]},
+        index=pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"]),
+    )
+    df["key"] = ["a", None, "c"]
+
+    stack.load_docs("idx", df, progbar=False)
+    stack.load_docs("idx", df, id_col="key", progbar=False)
+
+    by_index, by_key = bulk_calls
+    serializer = elastic.elasticsearch.serializer.JSONSerializer()
+    assert [serializer.dumps(a["_id"]) for a in by_index] == [
+        '"2020-01-01T00:00:00"',
+        '"2020-01-02T00:00:00"',
+        '"2020-01-03T00:00:00"',
+    ]
+    assert [a.get("_id") for a in by_key] == ["a", None, "c"]
+    assert "_id" not in by_key[1]
+
+
+@pytest.fixture
+def alias_stack(stack):
+    """Stack with an alias ``idx`` pointing to the indices ``idx-1`` and ``idx-2``."""
+    stack._es.indices.exists.return_value = True
+    stack._es.indices.get_settings.return_value = {
+        "idx-1": {"settings": {"index.refresh_interval": "5s"}},
+        "idx-2": {"settings": {}},
+    }
+    return stack
+
+
+def put_settings_calls(stack):
+    return [
+        (c.kwargs["index"], c.kwargs["body"]["index"])
+        for c in stack._es.indices.put_settings.call_args_list
+    ]
+
+
+def test_relax_and_restore_index_settings(alias_stack, bulk_calls):
+    df = pd.DataFrame({"value": range(3)})
+
+    alias_stack.load_docs("idx", df, progbar=False, relax_settings=True)
+
+    relaxed = {"refresh_interval": "-1", "translog.durability": "async"}
+    assert put_settings_calls(alias_stack) == [
+        ("idx-1", relaxed),
+        ("idx-2", relaxed),
+        ("idx-1", {"refresh_interval": "5s", "translog.durability": None}),
+        ("idx-2", {"refresh_interval": None, "translog.durability": None}),
+    ]
+    alias_stack._es.indices.refresh.assert_called_once_with(index="idx")
+
+
+def test_relax_index_settings_rolls_back_on_failure(alias_stack):
+    alias_stack._es.indices.put_settings.side_effect = [None, RuntimeError, None, None]
+
+    with pytest.raises(RuntimeError):
+        alias_stack.relax_index_settings("idx")
+
+    assert [i for i, _ in put_settings_calls(alias_stack)] == [
+        "idx-1",
+        "idx-2",
+        "idx-1",
+        "idx-2",
+    ]
+    assert put_settings_calls(alias_stack)[2][1]["refresh_interval"] == "5s"
+
+
+def test_load_docs_keeps_settings_by_default(alias_stack, bulk_calls):
+    alias_stack.load_docs("idx", pd.DataFrame({"value": range(3)}), progbar=False)
+
+    alias_stack._es.indices.get_settings.assert_not_called()
+    alias_stack._es.indices.put_settings.assert_not_called()
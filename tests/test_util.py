@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `nlpeasy.util`."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nlpeasy import util
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            0: [1, 2, 3],
+            "text": ["a", None, "c"],
+            "num": [1.5, np.nan, 2.0],
+            "nested": [[1.0, np.nan], None, []],
+        }
+    )
+
+
+EXPECTED = [
+    [{"0": 1, "text": "a", "num": 1.5, "nested": [1.0]}, {"0": 2}],
+    [{"0": 3, "text": "c", "num": 2.0, "nested": []}],
+]
+
+
+def test_record_chunks_pandas(df):
+    chunks = list(util.record_chunks(df, 2, progbar=False, use_arrow=False))
+    assert chunks == EXPECTED
+
+
+def test_record_chunks_arrow(df):
+    pytest.importorskip("pyarrow")
+    assert util._arrow_table(df) is not None
+    chunks = list(util.record_chunks(df, 2, progbar=False))
+    assert chunks == EXPECTED
+
+
+def test_record_chunks_mixed_types_fall_back_to_pandas():
+    df = pd.DataFrame({"mixed": [1, "x", None]})
+    assert util._arrow_table(df) is None
+    chunks = list(util.record_chunks(df, 2, progbar=False))
+    assert chunks == [[{"mixed": 1}, {"mixed": "x"}], [{}]]